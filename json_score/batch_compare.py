@@ -1,45 +1,75 @@
 #!/usr/bin/env python3
+import hashlib
 import os
+from functools import lru_cache
+from multiprocessing import Pool
 import pandas as pd
-from pedigree_core import load_json_file, extract_nodes, compute_metrics, compute_extended_metrics
+from pedigree_core import load_json_file, extract_nodes, analyze
 from pedigree_scoring import calculate_comprehensive_score
 
-def compare_pair(golden_file, detectron_file):
+@lru_cache(maxsize=None)
+def _metrics_for(path, mtime_ns):
+    nodes = extract_nodes(load_json_file(path))
+    return analyze(nodes)
+
+def metrics_for(path):
+    # Keyed on mtime so a file edited mid-run is re-scored
+    return _metrics_for(path, os.stat(path).st_mtime_ns)
+
+# Score of a pedigree compared against itself (no deductions)
+IDENTICAL_SCORE = 100.0
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).digest()
+
+def same_contents(path_a, path_b):
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    return _file_digest(path_a) == _file_digest(path_b)
+
+def compare_pair(pair):
+    i, golden_file, detectron_file = pair
     try:
-        golden_data = load_json_file(golden_file)
-        detectron_data = load_json_file(detectron_file)
-        
-        golden_nodes = extract_nodes(golden_data)
-        detectron_nodes = extract_nodes(detectron_data)
-        
-        golden_metrics = compute_metrics(golden_nodes)
-        detectron_metrics = compute_metrics(detectron_nodes)
-        
-        golden_ext = compute_extended_metrics(golden_nodes)
-        detectron_ext = compute_extended_metrics(detectron_nodes)
-        
+        golden_metrics, golden_ext = metrics_for(golden_file)
+        # Byte-identical pair: the golden file loaded and analyzed, so the detectron
+        # copy would too; skip its load and the scoring
+        if same_contents(golden_file, detectron_file):
+            return i, IDENTICAL_SCORE
+
+        detectron_metrics, detectron_ext = metrics_for(detectron_file)
+
         score_data = calculate_comprehensive_score(golden_metrics, detectron_metrics, golden_ext, detectron_ext)
-        
-        return score_data['final_score']
+
+        return i, score_data.final_score
     except:
-        return None
+        return i, None
+
+if __name__ == '__main__':
+    pairs = []
+    for i in range(1, 76):
+        golden_file = f'golden_jsons/{i}_golden.json'
+        detectron_file = f'detectron_jsons/{i}_detectron.json'
+        if os.path.exists(golden_file) and os.path.exists(detectron_file):
+            pairs.append((i, golden_file, detectron_file))
 
-results = []
+    # Pairs are independent; score them across all cores and restore file order afterwards
+    scores = {}
+    with Pool(processes=os.cpu_count()) as pool:
+        for i, score in pool.imap_unordered(compare_pair, pairs, chunksize=4):
+            scores[i] = score
+            print(f"✅ Compared {i}_golden vs {i}_detectron: Score = {score}")
 
-for i in range(1, 76):
-    golden_file = f'golden_jsons/{i}_golden.json'
-    detectron_file = f'detectron_jsons/{i}_detectron.json'
-    
-    if os.path.exists(golden_file) and os.path.exists(detectron_file):
-        score = compare_pair(golden_file, detectron_file)
+    results = []
+    for i, _, _ in pairs:
+        score = scores[i]
         results.append({
             'Golden File': f'{i}_golden.json',
             'Detectron File': f'{i}_detectron.json',
             'Score': score if score is not None else 'Error',
             'Image ID': ''
         })
-        print(f"✅ Compared {i}_golden vs {i}_detectron: Score = {score}")
 
-df = pd.DataFrame(results)
-df.to_excel('batch_comparison_results.xlsx', index=False)
-print(f"\n✅ Created batch_comparison_results.xlsx with {len(results)} comparisons")
+    df = pd.DataFrame(results)
+    df.to_excel('batch_comparison_results.xlsx', index=False)
+    print(f"\n✅ Created batch_comparison_results.xlsx with {len(results)} comparisons")
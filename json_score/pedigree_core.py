@@ -12,41 +12,154 @@ Core functionality for pedigree JSON processing:
 import json
 import sys
 import os
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Set, Tuple
 from collections import Counter
-
-
-def load_json_file(file_path: str) -> Dict:
-    """Load and validate JSON file"""
+from functools import lru_cache
+
+# Prefer orjson's faster parser when it is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Gender distribution buckets keyed by the node "sex" field
+GENDER_BY_SEX = {"M": "MALE", "F": "FEMALE"}
+
+# Disease pattern shape keyed by the node "sex" field
+SHAPE_BY_SEX = {"M": "SQUARE", "F": "CIRCLE"}
+
+# Model disease patterns (UPPERCASE_WITH_UNDERSCORES format)
+MODEL_DISEASE_PATTERNS = frozenset([
+    'CIRCLE_BOTTOM_HALF_FILLED', 'CIRCLE_CHECKERED', 'CIRCLE_CROSS_FILLED', 'CIRCLE_DIAGONAL_CHECKERED',
+    'CIRCLE_DIAGONAL_STROKES', 'CIRCLE_FILLED', 'CIRCLE_HORIZONTAL_STROKES', 'CIRCLE_LEFT_HALF_FILLED',
+    'CIRCLE_RIGHT_HALF_FILLED', 'CIRCLE_TOP_HALF_FILLED', 'CIRCLE_TOP_HALF_STROKES',
+    'CIRCLE_TOP_LEFT_QUARTER_FILLED', 'CIRCLE_TOP_RIGHT_QUARTER_FILLED', 'CIRCLE_VERTICAL_STROKES',
+    'SQUARE_BOTTOM_HALF_FILLED', 'SQUARE_CHECKERED', 'SQUARE_CROSS_FILLED', 'SQUARE_DIAGONAL_CHECKERED',
+    'SQUARE_DIAGONAL_STROKES', 'SQUARE_FILLED', 'SQUARE_HORIZONTAL_STROKES', 'SQUARE_LEFT_FILLED',
+    'SQUARE_RIGHT_FILLED', 'SQUARE_TOP_HALF_FILLED', 'SQUARE_TOP_HALF_STROKES',
+    'SQUARE_TOP_LEFT_QUARTER_FILLED', 'SQUARE_TOP_RIGHT_QUARTER_FILLED', 'SQUARE_VERTICAL_STROKES'
+])
+
+# Symbol types
+SYMBOL_TYPES = frozenset(['Adopted_in', 'Adopted_out', 'Carrier', 'Deceased', 'Divorce', 'Patient'])
+
+
+def _canonical_disease_name(shape: str, pattern: str) -> str:
+    """Combine shape and a raw shading pattern into SHAPE_PATTERN_NAME form"""
+    # Remove 'female' suffix if present and convert to uppercase with underscores
+    pattern = pattern.replace(" female", "")
+    pattern_upper = pattern.upper().replace("-", "_")
+    return f"{shape}_{pattern_upper}"
+
+
+# (shape, raw shading) -> disease pattern, precomputed for the lowercase-hyphen
+# spellings used in the JSON (with and without the " female" suffix)
+PATTERN_CANON: Dict[tuple, str] = {}
+for _disease in MODEL_DISEASE_PATTERNS:
+    _shape, _, _suffix = _disease.partition("_")
+    _raw = _suffix.lower().replace("_", "-")
+    PATTERN_CANON[(_shape, _raw)] = _disease
+    PATTERN_CANON[(_shape, f"{_raw} female")] = _disease
+del _disease, _shape, _suffix, _raw
+
+
+def _match_disease_pattern(shape: str, pattern: str):
+    """Return the model disease pattern for a shading entry, or None if unknown"""
+    full_disease = PATTERN_CANON.get((shape, pattern))
+    if full_disease is None:
+        # Uncommon spelling (e.g. different case); canonicalize the slow way
+        full_disease = _canonical_disease_name(shape, pattern)
+        if full_disease not in MODEL_DISEASE_PATTERNS:
+            return None
+    return full_disease
+
+
+@lru_cache(maxsize=512)
+def _load_json_cached(file_path: str, mtime_ns: int, size: int) -> Dict:
+    """Parse a JSON file; keyed on mtime/size so edited files are re-read"""
     try:
+        if ORJSON_AVAILABLE:
+            with open(file_path, 'rb') as f:
+                return orjson.loads(f.read())
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         raise FileNotFoundError(f"JSON file not found: {file_path}")
-    except json.JSONDecodeError as e:
+    except ValueError as e:
+        # Covers both json.JSONDecodeError and orjson.JSONDecodeError
         raise ValueError(f"Invalid JSON in file {file_path}: {e}")
 
 
+def load_json_file(file_path: str) -> Dict:
+    """
+    Load and validate JSON file.
+
+    Parsed results are cached per (path, mtime, size), so repeated loads of an
+    unchanged file return the same object. That object is mutated on purpose:
+    extract_nodes normalizes its nodes in place, so the cache ends up holding
+    normalized nodes. This is only safe because normalization is idempotent;
+    any other change to the returned data must be made on a copy.
+    """
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"JSON file not found: {file_path}")
+    return _load_json_cached(file_path, st.st_mtime_ns, st.st_size)
+
+
+# Node fields coerced to a fixed type by _normalize_nodes
+LIST_FIELDS = ("partners", "siblings", "divorced", "shading")
+FLAG_FIELDS = ("noparents", "top_level", "adopted_in", "adopted_out", "proband", "miscarriage")
+
+
+def _normalize_nodes(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Coerce list and flag fields in place so metric loops can skip type checks.
+
+    List fields become lists (a lone shading string is wrapped, anything else
+    non-list becomes []); flag fields become bools. Safe to run repeatedly.
+    """
+    for n in nodes:
+        for key in LIST_FIELDS:
+            value = n.get(key)
+            if not isinstance(value, list):
+                n[key] = [value] if key == "shading" and isinstance(value, str) else []
+        for key in FLAG_FIELDS:
+            n[key] = bool(n.get(key))
+    return nodes
+
+
 def extract_nodes(json_data: Dict) -> List[Dict[str, Any]]:
-    """Extract pedigree nodes from various JSON structures"""
+    """Extract pedigree nodes from various JSON structures (normalized in place)"""
     if isinstance(json_data, dict):
         # Handle original_json
         if "original_json" in json_data and "json" in json_data["original_json"]:
-            return json_data["original_json"]["json"]
+            return _normalize_nodes(json_data["original_json"]["json"])
         # Handle updated_json
         if "updated_json" in json_data and "json" in json_data["updated_json"]:
-            return json_data["updated_json"]["json"]
+            return _normalize_nodes(json_data["updated_json"]["json"])
         # Handle direct json key
         if "json" in json_data:
-            return json_data["json"]
+            return _normalize_nodes(json_data["json"])
     if isinstance(json_data, list):
-        return json_data
+        return _normalize_nodes(json_data)
     raise ValueError("Unable to extract pedigree nodes from JSON structure")
 
 
 # Removed count_parents function as it's no longer needed
 
 
+@lru_cache(maxsize=64)
+def generation_weights(total_levels: int) -> tuple:
+    """Normalized generation weights for levels 0..total_levels-1 (cached)"""
+    # Exponential decay base weight per level
+    raws = [1.0 / (1.2 ** l) for l in range(max(total_levels, 1))]
+    # Normalize across all levels
+    denom = sum(raws) or 1.0
+    return tuple(raw / denom for raw in raws)
+
+
 def calculate_generation_weight(level: int, total_levels: int) -> float:
     """
     Calculate weight for a generation level dynamically.
@@ -55,49 +168,17 @@ def calculate_generation_weight(level: int, total_levels: int) -> float:
     Uses exponential decay and normalizes weights so that
     the sum of weights across 0..total_levels-1 equals 1.0
     """
-    # Exponential decay base weight
-    raw = 1.0 / (1.2 ** max(level, 0))
-    # Normalize across all levels
-    denom = sum(1.0 / (1.2 ** l) for l in range(max(total_levels, 1))) or 1.0
-    return raw / denom
+    weights = generation_weights(total_levels)
+    level = max(level, 0)
+    if level < len(weights):
+        return weights[level]
+    # Level outside 0..total_levels-1: same decay, same normalization
+    return weights[0] / (1.2 ** level)
 
 
 def compute_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, int]:
-    """Compute basic metrics for pedigree nodes"""
-    total_nodes = len(nodes)
-
-    # Flags
-    nodes_with_noparents_true = sum(1 for n in nodes if bool(n.get("noparents")))
-    
-    # Partner counts
-    nodes_with_one_partner = sum(1 for n in nodes if isinstance(n.get("partners"), list) and len(n.get("partners")) == 1)
-    nodes_with_multiple_partners = sum(1 for n in nodes if isinstance(n.get("partners"), list) and len(n.get("partners")) > 1)
-    
-    # Sibling counts
-    nodes_with_siblings = 0
-    sibling_counts = {1: 0, 2: 0, 3: 0, 4: 0, "5+": 0}
-    for n in nodes:
-        siblings = n.get("siblings", [])
-        if isinstance(siblings, list) and siblings:
-            sibling_count = len(siblings)
-            nodes_with_siblings += 1
-            if sibling_count >= 5:
-                sibling_counts["5+"] += 1
-            else:
-                sibling_counts[sibling_count] += 1
-
-    return {
-        "total_nodes": total_nodes,
-        "nodes_with_no_parents_true": nodes_with_noparents_true,
-        "nodes_with_one_partner": nodes_with_one_partner,
-        "nodes_with_multiple_partners": nodes_with_multiple_partners,
-        "nodes_with_siblings": nodes_with_siblings,
-        "nodes_with_1_sibling": sibling_counts[1],
-        "nodes_with_2_siblings": sibling_counts[2],
-        "nodes_with_3_siblings": sibling_counts[3],
-        "nodes_with_4_siblings": sibling_counts[4],
-        "nodes_with_5_or_more_siblings": sibling_counts["5+"],
-    }
+    """Compute basic metrics for pedigree nodes (as returned by extract_nodes)"""
+    return analyze(nodes)[0]
 
 
 def print_metrics(label: str, metrics: Dict[str, int]) -> None:
@@ -118,6 +199,28 @@ def print_metrics(label: str, metrics: Dict[str, int]) -> None:
     print("")
 
 
+def sorted_level_counts(level_dist: Counter) -> Dict[Any, int]:
+    """Level counts in ascending level order, with the None level (if any) last"""
+    level_counts = dict(sorted(kv for kv in level_dist.items() if kv[0] is not None))
+    if None in level_dist:
+        level_counts[None] = level_dist[None]
+    return level_counts
+
+
+def set_column_widths(worksheet: Any, widths: List[int]) -> None:
+    """Apply per-column widths to an xlsxwriter worksheet, one set_column call per run of equal adjacent widths"""
+    start = 0
+    for idx in range(1, len(widths) + 1):
+        if idx == len(widths) or widths[idx] != widths[start]:
+            worksheet.set_column(start, idx - 1, widths[start])
+            start = idx
+
+
+def _canonical_pair(a: str, b: str) -> tuple:
+    """Order a pair the way tuple(sorted((a, b))) would, without the sort"""
+    return (a, b) if a <= b else (b, a)
+
+
 def _unique_sorted_pairs(pairs: List[List[str]]) -> Set[tuple]:
     """Extract unique sorted pairs from list of pairs"""
     unique_pairs: Set[tuple] = set()
@@ -131,143 +234,138 @@ def _unique_sorted_pairs(pairs: List[List[str]]) -> Set[tuple]:
             # unsupported shape
             continue
         if a and b and a != b:
-            unique_pairs.add(tuple(sorted((a, b))))
+            unique_pairs.add(_canonical_pair(a, b))
     return unique_pairs
 
 
 def compute_extended_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Compute comprehensive extended metrics for pedigree analysis"""
-    # Levels and basic distributions
-    level_dist: Counter = Counter()
-    for n in nodes:
-        # Only count in level distribution if it's level 0 with top_level true
-        # or if it's any other level regardless of top_level
-        if n.get("level") != 0 or (n.get("level") == 0 and bool(n.get("top_level"))):
-            level_dist[n.get("level")] += 1
-    generations_count = len(level_dist)
-    level_counts = dict(sorted(level_dist.items(), key=lambda kv: (kv[0] is None, kv[0])))
+    """Compute comprehensive extended metrics for pedigree analysis (nodes from extract_nodes)"""
+    return analyze(nodes)[1]
 
-    # Parent-child relations (needed for other calculations)
-    parent_to_children: Dict[str, List[str]] = {}
-    for n in nodes:
-        child_name = n.get("name")
-        for p in (n.get("father"), n.get("mother")):
-            if p:
-                parent_to_children.setdefault(p, []).append(child_name)
 
-    # Gender and naming - updated for new node types
-    gender_dist: Counter = Counter()
-    for n in nodes:
-        # Check for miscarriage flag first
-        if bool(n.get("miscarriage")):
-            gender_dist["MISCARRIAGE"] += 1
-        else:
-            # Then check sex
-            sex = n.get("sex")
-            if sex == "M":
-                gender_dist["MALE"] += 1
-            elif sex == "F":
-                gender_dist["FEMALE"] += 1
-            else:
-                gender_dist["UNKNOWN"] += 1
-
-    # Partnerships and divorces
-    partners_map: Dict[str, Set[str]] = {}
-    for n in nodes:
-        name = n.get("name")
-        partners = n.get("partners") or []
-        if isinstance(partners, list):
-            partners_map.setdefault(name, set()).update([p for p in partners if p and p != name])
+def analyze(nodes: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """
+    Compute basic and extended metrics in a single traversal of the nodes.
 
-    partnership_pairs: Set[tuple] = set()
-    for a, partners in partners_map.items():
-        for b in partners:
-            if a and b and a != b:
-                partnership_pairs.add(tuple(sorted((a, b))))
+    Returns (basic, extended), the same dicts compute_metrics and
+    compute_extended_metrics produce. Nodes must come from extract_nodes.
+    """
+    total_nodes = len(nodes)
 
+    # Basic metrics
+    nodes_with_noparents_true = 0
+    nodes_with_one_partner = 0
+    nodes_with_multiple_partners = 0
+    # sibling_buckets[k] counts nodes with k siblings; index 5 collects 5 or more
+    sibling_buckets = [0] * 6
+
+    # Extended metrics
+    level_dist: Counter = Counter()
+    gender_dist: Counter = Counter()
+    partnership_pairs: Set[tuple] = set()
     divorces_pairs: Set[tuple] = set()
-    for n in nodes:
-        name = n.get("name")
-        divs = n.get("divorced") or []
-        if isinstance(divs, list):
-            for d in divs:
-                if d and d != name:
-                    divorces_pairs.add(tuple(sorted((name, d))))
-
-    # Parents completeness and children distribution
     zero_parents = one_parent = two_parents = 0
+    disease_counts: Counter = Counter()
+    symbol_counts: Counter = Counter()
+    dztwin_count = mztwin_count = 0
+
+    # Single pass over the nodes updating every accumulator
     for n in nodes:
-        cnt = int(bool(n.get("father"))) + int(bool(n.get("mother")))
-        if cnt == 0:
+        get = n.get
+        name = get("name")
+        level = get("level")
+        sex = get("sex")
+        miscarriage = n["miscarriage"]
+        partners = n["partners"]
+
+        if n["noparents"]:
+            nodes_with_noparents_true += 1
+
+        # Partner counts
+        partner_count = len(partners)
+        if partner_count == 1:
+            nodes_with_one_partner += 1
+        elif partner_count > 1:
+            nodes_with_multiple_partners += 1
+
+        # Sibling counts
+        sibling_count = len(n["siblings"])
+        sibling_buckets[sibling_count if sibling_count < 5 else 5] += 1
+
+        # Levels: only count level 0 if top_level is true,
+        # any other level regardless of top_level
+        if level != 0 or n["top_level"]:
+            level_dist[level] += 1
+
+        # Gender and naming - miscarriage flag takes precedence over sex
+        gender_dist["MISCARRIAGE" if miscarriage else GENDER_BY_SEX.get(sex, "UNKNOWN")] += 1
+
+        # Partnerships and divorces (pairs ordered inline, as in _canonical_pair)
+        if name:
+            for p in partners:
+                if p and p != name:
+                    partnership_pairs.add((name, p) if name <= p else (p, name))
+        divorced = n["divorced"]
+        for d in divorced:
+            if d and d != name:
+                divorces_pairs.add((name, d) if name <= d else (d, name))
+
+        # Parents completeness
+        parent_count = (1 if get("father") else 0) + (1 if get("mother") else 0)
+        if parent_count == 0:
             zero_parents += 1
-        elif cnt == 1:
+        elif parent_count == 1:
             one_parent += 1
         else:
             two_parents += 1
 
-
-
-    # Diseases and Symbols
-    # Model disease patterns (UPPERCASE_WITH_UNDERSCORES format)
-    model_disease_patterns = [
-        'CIRCLE_BOTTOM_HALF_FILLED', 'CIRCLE_CHECKERED', 'CIRCLE_CROSS_FILLED', 'CIRCLE_DIAGONAL_CHECKERED', 
-        'CIRCLE_DIAGONAL_STROKES', 'CIRCLE_FILLED', 'CIRCLE_HORIZONTAL_STROKES', 'CIRCLE_LEFT_HALF_FILLED', 
-        'CIRCLE_RIGHT_HALF_FILLED', 'CIRCLE_TOP_HALF_FILLED', 'CIRCLE_TOP_HALF_STROKES', 
-        'CIRCLE_TOP_LEFT_QUARTER_FILLED', 'CIRCLE_TOP_RIGHT_QUARTER_FILLED', 'CIRCLE_VERTICAL_STROKES',
-        'SQUARE_BOTTOM_HALF_FILLED', 'SQUARE_CHECKERED', 'SQUARE_CROSS_FILLED', 'SQUARE_DIAGONAL_CHECKERED',
-        'SQUARE_DIAGONAL_STROKES', 'SQUARE_FILLED', 'SQUARE_HORIZONTAL_STROKES', 'SQUARE_LEFT_FILLED',
-        'SQUARE_RIGHT_FILLED', 'SQUARE_TOP_HALF_FILLED', 'SQUARE_TOP_HALF_STROKES',
-        'SQUARE_TOP_LEFT_QUARTER_FILLED', 'SQUARE_TOP_RIGHT_QUARTER_FILLED', 'SQUARE_VERTICAL_STROKES'
-    ]
-    
-    # Symbol types
-    symbol_types = ['Adopted_in', 'Adopted_out', 'Carrier', 'Deceased', 'Divorce', 'Patient']
-    
-    disease_counts: Counter = Counter()
-    symbol_counts: Counter = Counter()
-    
-    for n in nodes:
-        sex = n.get("sex")
-        shading_list = n.get("shading")
-        
         # Count disease patterns by combining sex + shading
         # Skip miscarriage nodes as they don't have traditional M/F sex for disease patterns
-        if shading_list and sex in ("M", "F") and not bool(n.get("miscarriage")):
-            # Determine shape based on sex
-            shape = "SQUARE" if sex == "M" else "CIRCLE"
-            
-            def process_shading_pattern(pattern: str) -> str:
-                # Remove 'female' suffix if present and convert to uppercase with underscores
-                pattern = pattern.replace(" female", "")
-                pattern_upper = pattern.upper().replace("-", "_")
-                return f"{shape}_{pattern_upper}"
-
-            if isinstance(shading_list, list):
-                for shading_pattern in shading_list:
-                    full_disease = process_shading_pattern(shading_pattern)
-                    # Only count if it's in the model's disease patterns
-                    if full_disease in model_disease_patterns:
-                        disease_counts[full_disease] += 1
-            elif isinstance(shading_list, str):
-                full_disease = process_shading_pattern(shading_list)
-                if full_disease in model_disease_patterns:
+        shading_list = n["shading"]
+        shape = SHAPE_BY_SEX.get(sex)
+        if shading_list and shape and not miscarriage:
+            for shading_pattern in shading_list:
+                # Only count if it's in the model's disease patterns
+                full_disease = _match_disease_pattern(shape, shading_pattern)
+                if full_disease:
                     disease_counts[full_disease] += 1
-        
+
         # Count symbols
-        if n.get("status") == 1:  # Deceased
+        if get("status") == 1:  # Deceased
             symbol_counts["Deceased"] += 1
-        if bool(n.get("adopted_in")):
+        if n["adopted_in"]:
             symbol_counts["Adopted_in"] += 1
-        if bool(n.get("adopted_out")):
+        if n["adopted_out"]:
             symbol_counts["Adopted_out"] += 1
-        if n.get("divorced"):  # Divorce
+        if divorced:  # Divorce
             symbol_counts["Divorce"] += 1
-        if bool(n.get("proband")):  # Patient (proband)
+        if n["proband"]:  # Patient (proband)
             symbol_counts["Patient"] += 1
         # Note: Carrier would need specific field in JSON to detect
 
+        # Twins
+        if get("dztwin") == 1:
+            dztwin_count += 1
+        if get("mztwin") == 1:
+            mztwin_count += 1
+
+    generations_count = len(level_dist)
+    level_counts = sorted_level_counts(level_dist)
 
-    return {
+    basic = {
+        "total_nodes": total_nodes,
+        "nodes_with_no_parents_true": nodes_with_noparents_true,
+        "nodes_with_one_partner": nodes_with_one_partner,
+        "nodes_with_multiple_partners": nodes_with_multiple_partners,
+        "nodes_with_siblings": total_nodes - sibling_buckets[0],
+        "nodes_with_1_sibling": sibling_buckets[1],
+        "nodes_with_2_siblings": sibling_buckets[2],
+        "nodes_with_3_siblings": sibling_buckets[3],
+        "nodes_with_4_siblings": sibling_buckets[4],
+        "nodes_with_5_or_more_siblings": sibling_buckets[5],
+    }
+
+    extended = {
         "structural": {
             "generations_count": generations_count,
             "nodes_per_level": level_counts
@@ -293,7 +391,9 @@ def compute_extended_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
             "symbol_counts": dict(symbol_counts),
         },
         "edges": {
-            "dztwin_count": sum(1 for n in nodes if n.get("dztwin") == 1),
-            "mztwin_count": sum(1 for n in nodes if n.get("mztwin") == 1),
+            "dztwin_count": dztwin_count,
+            "mztwin_count": mztwin_count,
         }
-    } 
\ No newline at end of file
+    }
+
+    return basic, extended
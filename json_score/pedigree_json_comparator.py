@@ -25,69 +25,74 @@ from collections import Counter
 
 try:
     import pandas as pd
+    import xlsxwriter  # Engine for pd.ExcelWriter
     PANDAS_AVAILABLE = True
 except ImportError:
     PANDAS_AVAILABLE = False
-    print("⚠️  Warning: pandas not available. Install with: pip install pandas openpyxl")
+    print("⚠️  Warning: pandas not available. Install with: pip install pandas xlsxwriter")
     print("   Excel export will be disabled, but console report will still work.")
 
 
-from pedigree_core import load_json_file, extract_nodes
+from pedigree_core import (
+    load_json_file,
+    extract_nodes,
+    generation_weights,
+    sorted_level_counts,
+    MODEL_DISEASE_PATTERNS,
+    SYMBOL_TYPES,
+    SHAPE_BY_SEX,
+    set_column_widths,
+)
 
+# Row labels for the Diseases and Symbols sheets, in display order
+_DISEASE_PATTERNS = tuple(sorted(MODEL_DISEASE_PATTERNS))
+_SYMBOL_TYPES = tuple(sorted(SYMBOL_TYPES))
 
-def count_parents(json_passed: List[Dict[str, Any]]) -> tuple:
-    """Count how many nodes have mother/father fields"""
-    mother, father = 0, 0
-    for object in json_passed:
-        if 'mother' in object:
-            mother += 1
-        if 'father' in object:
-            father += 1
-    return mother, father
+# Status symbols that carry a tier-3 penalty
+_IMPORTANT_SYMBOLS = ("Deceased", "Adopted_in", "Adopted_out")
 
+# Raw lowercase-hyphen shading -> UPPERCASE_UNDERSCORE suffix, precomputed for the model patterns
+_SHADING_UPPER = {
+    suffix.lower().replace("_", "-"): suffix
+    for suffix in {pattern.partition("_")[2] for pattern in MODEL_DISEASE_PATTERNS}
+}
 
-def calculate_generation_weight(level: int, total_levels: int) -> float:
-    """
-    Calculate weight for a generation level dynamically.
-    Higher weight for top levels, gradually decreasing.
-
-    Uses exponential decay and normalizes weights so that
-    the sum of weights across 0..total_levels-1 equals 1.0
-    """
-    # Exponential decay base weight
-    raw = 1.0 / (1.2 ** max(level, 0))
-    # Normalize across all levels
-    denom = sum(1.0 / (1.2 ** l) for l in range(max(total_levels, 1))) or 1.0
-    return raw / denom
+# Allowed UPPERCASE_UNDERSCORE suffixes of the model patterns, per shape
+_PATTERN_SUFFIXES_BY_SHAPE = {
+    shape: frozenset(p.partition("_")[2] for p in MODEL_DISEASE_PATTERNS if p.partition("_")[0] == shape)
+    for shape in SHAPE_BY_SEX.values()
+}
 
 
 def compute_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, int]:
     total_nodes = len(nodes)
 
-    # Remove single generation calculation
-
-    # Flags
-    nodes_with_noparents_true = sum(1 for n in nodes if bool(n.get("noparents")))
-    nodes_with_top_level_true = sum(1 for n in nodes if bool(n.get("top_level")))
-    nodes_with_partner = sum(1 for n in nodes if isinstance(n.get("partners"), list) and len(n.get("partners")) > 0)
-
-    # Parents/children relationships
-    name_set: Set[str] = {n.get("name") for n in nodes}
+    # Flags, partners and parent references in a single pass over the nodes
+    nodes_with_noparents_true = 0
+    nodes_with_top_level_true = 0
+    nodes_with_partner = 0
+    mother_count = father_count = 0
+    name_set: Set[str] = set()
     parent_names: Set[str] = set()
     for n in nodes:
-        father = n.get("father")
-        mother = n.get("mother")
-        if father:
-            parent_names.add(father)
-        if mother:
-            parent_names.add(mother)
+        name_set.add(n.get("name"))
+        if n["noparents"]:
+            nodes_with_noparents_true += 1
+        if n["top_level"]:
+            nodes_with_top_level_true += 1
+        if n["partners"]:
+            nodes_with_partner += 1
+        # Presence of the key counts, even when its value is empty
+        if "father" in n:
+            father_count += 1
+            if n["father"]:
+                parent_names.add(n["father"])
+        if "mother" in n:
+            mother_count += 1
+            if n["mother"]:
+                parent_names.add(n["mother"])
     nodes_with_child = len(parent_names & name_set)
 
-    # Parent counts
-    mother_count, father_count = count_parents(nodes)
-
-    # Remove independent nodes and special nodes calculations
-
     return {
         "total_nodes": total_nodes,
         "nodes_with_no_parents_true": nodes_with_noparents_true,
@@ -124,88 +129,94 @@ def _unique_sorted_pairs(pairs: List[List[str]]) -> Set[tuple]:
             # unsupported shape
             continue
         if a and b and a != b:
-            unique_pairs.add(tuple(sorted((a, b))))
+            unique_pairs.add((a, b) if a <= b else (b, a))
     return unique_pairs
 
 
-def compute_extended_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
-    name_to_node: Dict[str, Dict[str, Any]] = {n.get("name"): n for n in nodes}
+def _overlapping_pairs(boxes: List[tuple]) -> List[tuple]:
+    """
+    Find overlapping (name, [x1, y1, x2, y2]) boxes; touching edges count as overlap.
+
+    Boxes are swept left to right, and each one is tested only against boxes whose
+    x-range is still open. Pairs are returned in input order, (i, j) with i < j.
+    """
+    rects = []
+    for x1, y1, x2, y2 in (c for _, c in boxes):
+        rects.append((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+
+    hits: List[tuple] = []
+    active: List[int] = []
+    for i in sorted(range(len(rects)), key=lambda k: rects[k][0]):
+        left, top, right, bottom = rects[i]
+        # Boxes ending before this one starts can't overlap any later box either
+        active = [j for j in active if rects[j][2] >= left]
+        for j in active:
+            if not (rects[j][3] < top or bottom < rects[j][1]):
+                hits.append((j, i) if j < i else (i, j))
+        active.append(i)
+
+    hits.sort()
+    return [(boxes[i][0], boxes[j][0]) for i, j in hits]
 
-    # Levels and basic distributions
-    level_dist: Counter = Counter()
-    for n in nodes:
-        level_dist[n.get("level")] += 1
-    generations_count = len(level_dist)
-    level_counts = dict(sorted(level_dist.items(), key=lambda kv: (kv[0] is None, kv[0])))
-    per_level_sizes = list(level_dist.values())
-    per_level_min = min(per_level_sizes) if per_level_sizes else 0
-    per_level_max = max(per_level_sizes) if per_level_sizes else 0
-    per_level_avg = (sum(per_level_sizes) / len(per_level_sizes)) if per_level_sizes else 0.0
 
-    # Parent-child relations
+def compute_extended_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Accumulators filled by the single pass over the nodes below
+    level_dist: Counter = Counter()
+    name_counts: Counter = Counter()
     parent_to_children: Dict[str, List[str]] = {}
     all_children: Set[str] = set()
     parent_names: Set[str] = set()
-    for n in nodes:
-        child_name = n.get("name")
-        for p in (n.get("father"), n.get("mother")):
-            if p:
-                parent_names.add(p)
-                parent_to_children.setdefault(p, []).append(child_name)
-                all_children.add(child_name)
-
-    root_nodes_count = sum(1 for n in nodes if not n.get("father") and not n.get("mother"))
-    leaf_nodes_count = sum(1 for n in nodes if n.get("name") not in parent_names)
-
-    # Gender and naming - updated for new node types
-    gender_dist: Counter = Counter()
-    for n in nodes:
-        # Check for miscarriage flag first
-        if bool(n.get("miscarriage")):
-            gender_dist["MISCARRIAGE"] += 1
-        else:
-            # Then check sex
-            sex = n.get("sex")
-            if sex == "M":
-                gender_dist["MALE"] += 1
-            elif sex == "F":
-                gender_dist["FEMALE"] += 1
-            else:
-                gender_dist["UNKNOWN"] += 1
-
-    # Partnerships and divorces
+    # Fixed key sets: plain dicts with zero slots (zeros are dropped on return)
+    gender_dist: Dict[str, int] = {"MALE": 0, "FEMALE": 0, "UNKNOWN": 0, "MISCARRIAGE": 0}
     partners_map: Dict[str, Set[str]] = {}
-    for n in nodes:
-        name = n.get("name")
-        partners = n.get("partners") or []
-        if isinstance(partners, list):
-            partners_map.setdefault(name, set()).update([p for p in partners if p and p != name])
-
     partnership_pairs: Set[tuple] = set()
-    for a, partners in partners_map.items():
-        for b in partners:
-            if a and b and a != b:
-                partnership_pairs.add(tuple(sorted((a, b))))
+    divorces_pairs: Set[tuple] = set()
+    zero_parents = one_parent = two_parents = 0
+    dztwin_count = mztwin_count = 0
+    siblings_map: Dict[str, Set[str]] = {}
+    seen_sibling_groups: Set[frozenset] = set()
+    sibling_groups: List[frozenset] = []
+    disease_counts: Counter = Counter()
+    symbol_counts: Dict[str, int] = {"Deceased": 0, "Adopted_in": 0, "Adopted_out": 0, "Divorce": 0, "Patient": 0}
+    level_to_center_ys: Dict[Any, List[float]] = {}
+    with_coords: List[tuple] = []
 
-    avg_partners_per_node = sum(len(s) for s in partners_map.values()) / max(len(nodes), 1)
-    max_partners_for_single_node = max((len(s) for s in partners_map.values()), default=0)
+    # Consistency checks
+    issues_self_ref: List[str] = []
+    issues_contradictions: List[str] = []
+    issues_partner_asym: List[str] = []
+    issues_sibling_asym: List[str] = []
 
-    divorces_pairs: Set[tuple] = set()
-    for n in nodes:
-        name = n.get("name")
-        divs = n.get("divorced") or []
-        if isinstance(divs, list):
-            for d in divs:
-                if d and d != name:
-                    divorces_pairs.add(tuple(sorted((name, d))))
-
-    partnered_nodes_count = sum(1 for s in partners_map.values() if len(s) > 0)
-    divorce_rate = (len(divorces_pairs) / max(len(partnership_pairs), 1)) * 100.0 if partnership_pairs else 0.0
+    # Bound methods for the sets updated on every node
+    add_parent = parent_names.add
+    add_child = all_children.add
+    add_partnership = partnership_pairs.add
+    add_divorce = divorces_pairs.add
 
-    # Parents completeness and children distribution
-    zero_parents = one_parent = two_parents = 0
     for n in nodes:
-        cnt = int(bool(n.get("father"))) + int(bool(n.get("mother")))
+        get = n.get
+        name = get("name")
+        father = get("father")
+        mother = get("mother")
+        sex = get("sex")
+        partners = n["partners"]
+        sibs = n["siblings"]
+        divs = n["divorced"]
+        shading_list = n["shading"]
+        level = get("level")
+        miscarriage = n["miscarriage"]
+
+        # Levels and names
+        level_dist[level] += 1
+        name_counts[name] += 1
+
+        # Parent-child relations and parents completeness
+        for p in (father, mother):
+            if p:
+                add_parent(p)
+                parent_to_children.setdefault(p, []).append(name)
+                add_child(name)
+        cnt = int(bool(father)) + int(bool(mother))
         if cnt == 0:
             zero_parents += 1
         elif cnt == 1:
@@ -213,169 +224,145 @@ def compute_extended_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
         else:
             two_parents += 1
 
-    children_counts = [len(children) for children in parent_to_children.values()]
-    min_children = min(children_counts) if children_counts else 0
-    max_children = max(children_counts) if children_counts else 0
-    avg_children = (sum(children_counts) / len(children_counts)) if children_counts else 0.0
+        # Twins
+        if get("dztwin") == 1:
+            dztwin_count += 1
+        if get("mztwin") == 1:
+            mztwin_count += 1
 
-    # Sibling groups
-    sibling_groups: List[Set[str]] = []
-    for n in nodes:
-        name = n.get("name")
-        sibs = n.get("siblings") or []
+        # Gender and naming - miscarriage flag takes precedence over sex
+        if miscarriage:
+            gender_dist["MISCARRIAGE"] += 1
+        elif sex == "M":
+            gender_dist["MALE"] += 1
+        elif sex == "F":
+            gender_dist["FEMALE"] += 1
+        else:
+            gender_dist["UNKNOWN"] += 1
+
+        # Partnerships and divorces
+        partner_set = partners_map.setdefault(name, set())
+        for p in partners:
+            if p and p != name:
+                partner_set.add(p)
+                if name:
+                    add_partnership((name, p) if name <= p else (p, name))
+        for d in divs:
+            if d and d != name:
+                add_divorce((name, d) if name <= d else (d, name))
+
+        # Sibling map (last node wins for a repeated name) and sibling groups
+        siblings_map[name] = set(sibs)
         if sibs:
-            group = set([name] + [s for s in sibs if s])
-            if len(group) > 1:
-                fg = frozenset(group)
-                if fg not in [frozenset(g) for g in sibling_groups]:
-                    sibling_groups.append(group)
-    sibling_group_sizes = [len(g) for g in sibling_groups]
-    sibling_groups_count = len(sibling_groups)
-    sibling_min = min(sibling_group_sizes) if sibling_group_sizes else 0
-    sibling_max = max(sibling_group_sizes) if sibling_group_sizes else 0
-    sibling_avg = (sum(sibling_group_sizes) / len(sibling_group_sizes)) if sibling_group_sizes else 0.0
+            fg = frozenset([name] + [s for s in sibs if s])
+            if len(fg) > 1 and fg not in seen_sibling_groups:
+                seen_sibling_groups.add(fg)
+                sibling_groups.append(fg)
 
-    # Diseases and Symbols
-    # Model disease patterns (UPPERCASE_WITH_UNDERSCORES format)
-    model_disease_patterns = [
-        'CIRCLE_BOTTOM_HALF_FILLED', 'CIRCLE_CHECKERED', 'CIRCLE_CROSS_FILLED', 'CIRCLE_DIAGONAL_CHECKERED', 
-        'CIRCLE_DIAGONAL_STROKES', 'CIRCLE_FILLED', 'CIRCLE_HORIZONTAL_STROKES', 'CIRCLE_LEFT_HALF_FILLED', 
-        'CIRCLE_RIGHT_HALF_FILLED', 'CIRCLE_TOP_HALF_FILLED', 'CIRCLE_TOP_HALF_STROKES', 
-        'CIRCLE_TOP_LEFT_QUARTER_FILLED', 'CIRCLE_TOP_RIGHT_QUARTER_FILLED', 'CIRCLE_VERTICAL_STROKES',
-        'SQUARE_BOTTOM_HALF_FILLED', 'SQUARE_CHECKERED', 'SQUARE_CROSS_FILLED', 'SQUARE_DIAGONAL_CHECKERED',
-        'SQUARE_DIAGONAL_STROKES', 'SQUARE_FILLED', 'SQUARE_HORIZONTAL_STROKES', 'SQUARE_LEFT_FILLED',
-        'SQUARE_RIGHT_FILLED', 'SQUARE_TOP_HALF_FILLED', 'SQUARE_TOP_HALF_STROKES',
-        'SQUARE_TOP_LEFT_QUARTER_FILLED', 'SQUARE_TOP_RIGHT_QUARTER_FILLED', 'SQUARE_VERTICAL_STROKES'
-    ]
-    
-    # Symbol types
-    symbol_types = ['Adopted_in', 'Adopted_out', 'Carrier', 'Deceased', 'Divorce', 'Patient']
-    
-    disease_counts: Counter = Counter()
-    symbol_counts: Counter = Counter()
-    
-    for n in nodes:
-        sex = n.get("sex")
-        shading_list = n.get("shading")
-        
         # Count disease patterns by combining sex + shading
         # Skip miscarriage nodes as they don't have traditional M/F sex for disease patterns
-        if shading_list and sex in ("M", "F") and not bool(n.get("miscarriage")):
-            # Determine shape based on sex
-            shape = "SQUARE" if sex == "M" else "CIRCLE"
-            
-            if isinstance(shading_list, list):
-                for shading_pattern in shading_list:
-                    # Convert lowercase-hyphen to UPPERCASE_UNDERSCORE format
-                    pattern_upper = shading_pattern.upper().replace("-", "_")
-                    full_disease = f"{shape}_{pattern_upper}"
-                    
-                    # Only count if it's in the model's disease patterns
-                    if full_disease in model_disease_patterns:
-                        disease_counts[full_disease] += 1
-            elif isinstance(shading_list, str):
-                pattern_upper = shading_list.upper().replace("-", "_")
-                full_disease = f"{shape}_{pattern_upper}"
-                if full_disease in model_disease_patterns:
-                    disease_counts[full_disease] += 1
-        
+        shape = SHAPE_BY_SEX.get(sex)
+        if shading_list and shape and not miscarriage:
+            allowed = _PATTERN_SUFFIXES_BY_SHAPE[shape]
+            for shading_pattern in shading_list:
+                # Convert lowercase-hyphen to UPPERCASE_UNDERSCORE format (table hit for model patterns)
+                pattern_upper = _SHADING_UPPER.get(shading_pattern) or shading_pattern.upper().replace("-", "_")
+
+                # Only count if it's in the model's disease patterns
+                if pattern_upper in allowed:
+                    disease_counts[f"{shape}_{pattern_upper}"] += 1
+
         # Count symbols
-        if n.get("status") == 1:  # Deceased
+        if get("status") == 1:  # Deceased
             symbol_counts["Deceased"] += 1
-        if bool(n.get("adopted_in")):
+        if n["adopted_in"]:
             symbol_counts["Adopted_in"] += 1
-        if bool(n.get("adopted_out")):
+        if n["adopted_out"]:
             symbol_counts["Adopted_out"] += 1
-        if n.get("divorced"):  # Divorce
+        if divs:  # Divorce
             symbol_counts["Divorce"] += 1
-        if bool(n.get("proband")):  # Patient (proband)
+        if n["proband"]:  # Patient (proband)
             symbol_counts["Patient"] += 1
         # Note: Carrier would need specific field in JSON to detect
 
-    # Consistency checks
-    issues_self_ref: List[str] = []
-    issues_duplicates: List[str] = []
-    issues_contradictions: List[str] = []
-    issues_partner_asym: List[str] = []
-    issues_sibling_asym: List[str] = []
-
-    # Duplicate names
-    name_counts: Counter = Counter(n.get("name") for n in nodes)
-    for nm, c in name_counts.items():
-        if c > 1:
-            issues_duplicates.append(f"Duplicate name '{nm}' appears {c} times")
-
-    # Self-refs and contradictions
-    for n in nodes:
-        name = n.get("name")
-        father = n.get("father")
-        mother = n.get("mother")
-        if father:
-            if father == name:
-                issues_self_ref.append(f"{name}: self-referenced as father")
-        if mother:
-            if mother == name:
-                issues_self_ref.append(f"{name}: self-referenced as mother")
-        partners = n.get("partners") or []
-        if isinstance(partners, list) and name in partners:
+        # Self-refs and contradictions
+        if father and father == name:
+            issues_self_ref.append(f"{name}: self-referenced as father")
+        if mother and mother == name:
+            issues_self_ref.append(f"{name}: self-referenced as mother")
+        if name in partners:
             issues_self_ref.append(f"{name}: self-referenced as partner")
-        sibs = n.get("siblings") or []
-        if isinstance(sibs, list) and name in sibs:
+        if name in sibs:
             issues_self_ref.append(f"{name}: self-referenced as sibling")
-        if bool(n.get("noparents")) and (father or mother):
+        if n["noparents"] and (father or mother):
             issues_contradictions.append(f"{name}: noparents==true but has parents listed")
-        if bool(n.get("top_level")) and (father or mother):
+        if n["top_level"] and (father or mother):
             issues_contradictions.append(f"{name}: top_level==true but has parents listed")
 
+        # Center y per level
+        center = get("center")
+        if isinstance(center, list) and len(center) == 2:
+            level_to_center_ys.setdefault(level, []).append(float(center[1]))
+
+        # Bounding boxes
+        coords = get("coordinates")
+        if isinstance(coords, list) and len(coords) == 4:
+            with_coords.append((name, coords))
+
+    # Level aggregates
+    generations_count = len(level_dist)
+    level_counts = sorted_level_counts(level_dist)
+    per_level_sizes = list(level_dist.values())
+    per_level_min = min(per_level_sizes) if per_level_sizes else 0
+    per_level_max = max(per_level_sizes) if per_level_sizes else 0
+    per_level_avg = (sum(per_level_sizes) / len(per_level_sizes)) if per_level_sizes else 0.0
+
+    # Roots are the nodes without parents; leaves are counted per node via name_counts
+    root_nodes_count = zero_parents
+    leaf_nodes_count = sum(c for nm, c in name_counts.items() if nm not in parent_names)
+
+    # Partnership aggregates
+    avg_partners_per_node = sum(len(s) for s in partners_map.values()) / max(len(nodes), 1)
+    max_partners_for_single_node = max((len(s) for s in partners_map.values()), default=0)
+    divorce_rate = (len(divorces_pairs) / max(len(partnership_pairs), 1)) * 100.0 if partnership_pairs else 0.0
+
+    # Children and sibling group aggregates
+    children_counts = [len(children) for children in parent_to_children.values()]
+    min_children = min(children_counts) if children_counts else 0
+    max_children = max(children_counts) if children_counts else 0
+    avg_children = (sum(children_counts) / len(children_counts)) if children_counts else 0.0
+
+    sibling_group_sizes = [len(g) for g in sibling_groups]
+    sibling_groups_count = len(sibling_groups)
+    sibling_min = min(sibling_group_sizes) if sibling_group_sizes else 0
+    sibling_max = max(sibling_group_sizes) if sibling_group_sizes else 0
+    sibling_avg = (sum(sibling_group_sizes) / len(sibling_group_sizes)) if sibling_group_sizes else 0.0
+
+    # Duplicate names
+    issues_duplicates = [f"Duplicate name '{nm}' appears {c} times" for nm, c in name_counts.items() if c > 1]
+
     # Partner symmetry
     for a, partners in partners_map.items():
         for b in partners:
-            if b not in partners_map or a not in partners_map.get(b, set()):
+            if b not in partners_map or a not in partners_map[b]:
                 issues_partner_asym.append(f"Partner asymmetry: {a} lists {b}, but not vice versa")
 
     # Sibling symmetry
-    siblings_map: Dict[str, Set[str]] = {}
-    for n in nodes:
-        siblings_map[n.get("name")] = set(n.get("siblings") or [])
     for a, sibs in siblings_map.items():
         for b in sibs:
-            if a not in siblings_map.get(b, set()):
+            if b not in siblings_map or a not in siblings_map[b]:
                 issues_sibling_asym.append(f"Sibling asymmetry: {a} lists {b}, but not vice versa")
 
     # Spatial metrics
-    coords_list = [n.get("coordinates") for n in nodes if isinstance(n.get("coordinates"), list) and len(n.get("coordinates")) == 4]
+    coords_list = [c for _, c in with_coords]
     min_x = min((min(c[0], c[2]) for c in coords_list), default=None)
     max_x = max((max(c[0], c[2]) for c in coords_list), default=None)
     min_y = min((min(c[1], c[3]) for c in coords_list), default=None)
     max_y = max((max(c[1], c[3]) for c in coords_list), default=None)
-
-    # avg center y per level
-    level_to_center_ys: Dict[Any, List[float]] = {}
-    for n in nodes:
-        center = n.get("center")
-        if isinstance(center, list) and len(center) == 2:
-            level_to_center_ys.setdefault(n.get("level"), []).append(float(center[1]))
     avg_center_y_per_level = {lvl: (sum(vals) / len(vals)) for lvl, vals in level_to_center_ys.items() if vals}
 
-    # Overlapping boxes detection (naive O(n^2))
-    def rect_from_coords(c: List[float]):
-        x1, y1, x2, y2 = c
-        left, right = min(x1, x2), max(x1, x2)
-        top, bottom = min(y1, y2), max(y1, y2)
-        return left, top, right, bottom
-
-    def overlap(a: List[float], b: List[float]) -> bool:
-        al, at, ar, ab = rect_from_coords(a)
-        bl, bt, br, bb = rect_from_coords(b)
-        return not (ar < bl or br < al or ab < bt or bb < at)
-
-    overlapping_pairs: List[tuple] = []
-    with_coords = [(n.get("name"), n.get("coordinates")) for n in nodes if isinstance(n.get("coordinates"), list) and len(n.get("coordinates")) == 4]
-    for i in range(len(with_coords)):
-        for j in range(i + 1, len(with_coords)):
-            (na, ca), (nb, cb) = with_coords[i], with_coords[j]
-            if overlap(ca, cb):
-                overlapping_pairs.append((na, nb))
+    # Overlapping boxes detection (sweep-line over x)
+    overlapping_pairs = _overlapping_pairs(with_coords)
 
     return {
         "structural": {
@@ -388,7 +375,7 @@ def compute_extended_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
             "leaf_nodes_count": leaf_nodes_count,
         },
         "gender_and_naming": {
-            "gender_distribution": dict(gender_dist),
+            "gender_distribution": {k: v for k, v in gender_dist.items() if v},
         },
         "partnerships": {
             "partnerships_count": len(partnership_pairs),
@@ -419,11 +406,11 @@ def compute_extended_metrics(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
             "disease_counts": dict(disease_counts),
         },
         "symbols": {
-            "symbol_counts": dict(symbol_counts),
+            "symbol_counts": {k: v for k, v in symbol_counts.items() if v},
         },
         "edges": {
-            "dztwin_count": sum(1 for n in nodes if n.get("dztwin") == 1),
-            "mztwin_count": sum(1 for n in nodes if n.get("mztwin") == 1),
+            "dztwin_count": dztwin_count,
+            "mztwin_count": mztwin_count,
         },
         "consistency_checks": {
             "self_references": issues_self_ref,
@@ -473,15 +460,12 @@ def calculate_comprehensive_score(golden_metrics: Dict[str, int], test_metrics:
     max_level = max(numeric_levels) if numeric_levels else 0
     total_levels = max_level + 1
 
-    weighted_level_error = 0.0
-    for level in all_levels:
-        if not isinstance(level, int) or level < 0:
-            continue
-        golden_count = golden_levels.get(level, 0)
-        test_count = test_levels.get(level, 0)
-        diff = abs(golden_count - test_count)
-        weight = calculate_generation_weight(level, total_levels)
-        weighted_level_error += diff * weight
+    # Weights for 0..total_levels-1 are computed once (and cached across pairs)
+    weights = generation_weights(total_levels)
+    weighted_level_error = sum(
+        abs(golden_levels.get(level, 0) - test_levels.get(level, 0)) * weights[level]
+        for level in numeric_levels
+    )
 
     # Scale by the same per-node penalty (2 pts) as before
     tier1_deductions += weighted_level_error * 2
@@ -525,20 +509,13 @@ def calculate_comprehensive_score(golden_metrics: Dict[str, int], test_metrics:
     # Disease patterns
     golden_diseases = golden_ext["shading"]["disease_counts"]
     test_diseases = test_ext["shading"]["disease_counts"]
-    all_diseases = set(golden_diseases.keys()) | set(test_diseases.keys())
-    
-    for disease in all_diseases:
-        disease_diff = abs(golden_diseases.get(disease, 0) - test_diseases.get(disease, 0))
-        tier3_deductions += disease_diff * 1
+    all_diseases = golden_diseases.keys() | test_diseases.keys()
+    tier3_deductions += sum(abs(golden_diseases.get(d, 0) - test_diseases.get(d, 0)) for d in all_diseases) * 1
     
     # Status symbols
     golden_symbols = golden_ext["symbols"]["symbol_counts"]
     test_symbols = test_ext["symbols"]["symbol_counts"]
-    important_symbols = ["Deceased", "Adopted_in", "Adopted_out"]
-    
-    for symbol in important_symbols:
-        symbol_diff = abs(golden_symbols.get(symbol, 0) - test_symbols.get(symbol, 0))
-        tier3_deductions += symbol_diff * 2
+    tier3_deductions += sum(abs(golden_symbols.get(s, 0) - test_symbols.get(s, 0)) for s in _IMPORTANT_SYMBOLS) * 2
     
     # Twin relationships
     dz_diff = abs(golden_ext["edges"]["dztwin_count"] - test_ext["edges"]["dztwin_count"])
@@ -597,6 +574,18 @@ def print_score_breakdown(score_data: Dict[str, float]) -> None:
     print("")
 
 
+def _write_sheet(writer, sheet_name: str, data) -> None:
+    """Write rows or columns to a sheet and size columns from the frame data (+2 padding, max 50)"""
+    df = pd.DataFrame(data)
+    df.to_excel(writer, sheet_name=sheet_name, index=False)
+    worksheet = writer.sheets[sheet_name]
+    # Longest cell per column over the whole frame in one pass, then compare with the header
+    cell_lengths = df.astype(str).apply(lambda column: column.str.len().max())
+    set_column_widths(worksheet, [
+        min(max(len(str(col)), int(length)) + 2, 50) for col, length in cell_lengths.items()
+    ])
+
+
 def export_metrics_to_excel(golden: Dict[str, int], test: Dict[str, int], excel_file: str = "comparison_results.xlsx") -> None:
     if not PANDAS_AVAILABLE:
         return
@@ -609,35 +598,33 @@ def export_metrics_to_excel(golden: Dict[str, int], test: Dict[str, int], excel_
                 "Test": test[key],
                 "Difference (Golden - Test)": golden[key] - test[key],
             })
-        df = pd.DataFrame(rows)
-        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='General', index=False)
-            # Auto width
-            for sheet_name in writer.sheets:
-                worksheet = writer.sheets[sheet_name]
-                for column in worksheet.columns:
-                    max_length = 0
-                    column = [cell for cell in column]
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except Exception:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
+        with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
+            _write_sheet(writer, 'General', rows)
         print(f"Excel report exported to: {excel_file}")
     except Exception as e:
         print(f"Error exporting to Excel: {e}")
 
 
+def _comparison_columns(labels: List[str], golden_vals: List[Any], test_vals: List[Any]) -> Dict[str, List[Any]]:
+    """Metric/Golden/Test/Difference columns for one sheet, built column-wise"""
+    return {
+        "Metric": labels,
+        "Golden": golden_vals,
+        "Test": test_vals,
+        "Difference": [
+            (g - t) if isinstance(g, (int, float)) and isinstance(t, (int, float)) else ""
+            for g, t in zip(golden_vals, test_vals)
+        ],
+    }
+
+
 def export_extended_to_excel(excel_file: str, golden_ext: Dict[str, Any], test_ext: Dict[str, Any], 
                            golden_metrics: Dict[str, int], test_metrics: Dict[str, int], 
                            score_data: Dict[str, float]) -> None:
     if not PANDAS_AVAILABLE:
         return
     try:
-        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+        with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
             # Score Summary Sheet
             score_rows = [
                 {"Metric": "Final Score", "Value": f"{score_data['final_score']:.1f}/100", "Details": ""},
@@ -646,93 +633,46 @@ def export_extended_to_excel(excel_file: str, golden_ext: Dict[str, Any], test_e
                 {"Metric": "Tier 3 (Attributes)", "Value": f"-{score_data['tier3_weighted']:.1f} pts", "Details": "Symbols + Diseases + Twins"},
                 {"Metric": "Total Deductions", "Value": f"-{score_data['total_deductions']:.1f} pts", "Details": "Sum of all penalties"}
             ]
-            pd.DataFrame(score_rows).to_excel(writer, sheet_name='Score Summary', index=False)
+            _write_sheet(writer, 'Score Summary', score_rows)
 
             # Generation (renamed from Structural)
-            rows = []
-            def add_row(metric, gval, tval):
-                rows.append({
-                    "Metric": metric,
-                    "Golden": gval,
-                    "Test": tval,
-                    "Difference": (gval - tval) if isinstance(gval, (int, float)) and isinstance(tval, (int, float)) else "",
-                })
             gs = golden_ext["structural"]
             ts = test_ext["structural"]
-            add_row("Generations Count", gs["generations_count"], ts["generations_count"])
             # nodes per level (union of levels)
             levels = sorted(set(gs["nodes_per_level"].keys()) | set(ts["nodes_per_level"].keys()), key=lambda x: (x is None, x))
-            for lvl in levels:
-                g = gs["nodes_per_level"].get(lvl, 0)
-                t = ts["nodes_per_level"].get(lvl, 0)
-                add_row(f"Nodes at level {lvl}", g, t)
-            pd.DataFrame(rows).to_excel(writer, sheet_name='Generation', index=False)
-
-            # Nodes (combining general metrics + gender)
-            rows = []
-            
-            # Add general metrics first
-            for key in golden_metrics.keys():
-                add_row(key.replace('_', ' ').title(), golden_metrics[key], test_metrics[key])
-            
-            # Add gender distribution
-            gg = golden_ext["gender_and_naming"]
-            tg = test_ext["gender_and_naming"]
-            for sex in sorted(set(gg["gender_distribution"].keys()) | set(tg["gender_distribution"].keys())):
-                add_row(f"{sex}", gg["gender_distribution"].get(sex, 0), tg["gender_distribution"].get(sex, 0))
-            pd.DataFrame(rows).to_excel(writer, sheet_name='Nodes', index=False)
-
-            # Diseases (show all possible disease patterns)
-            rows = []
-            gd = golden_ext["shading"]
-            td = test_ext["shading"]
-            # All possible disease patterns from model
-            all_disease_patterns = [
-                'CIRCLE_BOTTOM_HALF_FILLED', 'CIRCLE_CHECKERED', 'CIRCLE_CROSS_FILLED', 'CIRCLE_DIAGONAL_CHECKERED', 
-                'CIRCLE_DIAGONAL_STROKES', 'CIRCLE_FILLED', 'CIRCLE_HORIZONTAL_STROKES', 'CIRCLE_LEFT_HALF_FILLED', 
-                'CIRCLE_RIGHT_HALF_FILLED', 'CIRCLE_TOP_HALF_FILLED', 'CIRCLE_TOP_HALF_STROKES', 
-                'CIRCLE_TOP_LEFT_QUARTER_FILLED', 'CIRCLE_TOP_RIGHT_QUARTER_FILLED', 'CIRCLE_VERTICAL_STROKES',
-                'SQUARE_BOTTOM_HALF_FILLED', 'SQUARE_CHECKERED', 'SQUARE_CROSS_FILLED', 'SQUARE_DIAGONAL_CHECKERED',
-                'SQUARE_DIAGONAL_STROKES', 'SQUARE_FILLED', 'SQUARE_HORIZONTAL_STROKES', 'SQUARE_LEFT_FILLED',
-                'SQUARE_RIGHT_FILLED', 'SQUARE_TOP_HALF_FILLED', 'SQUARE_TOP_HALF_STROKES',
-                'SQUARE_TOP_LEFT_QUARTER_FILLED', 'SQUARE_TOP_RIGHT_QUARTER_FILLED', 'SQUARE_VERTICAL_STROKES'
-            ]
-            for pattern in sorted(all_disease_patterns):
-                add_row(f"{pattern}", gd["disease_counts"].get(pattern, 0), td["disease_counts"].get(pattern, 0))
-            pd.DataFrame(rows).to_excel(writer, sheet_name='Diseases', index=False)
+            labels = ["Generations Count"] + [f"Nodes at level {lvl}" for lvl in levels]
+            golden_vals = [gs["generations_count"]] + [gs["nodes_per_level"].get(lvl, 0) for lvl in levels]
+            test_vals = [ts["generations_count"]] + [ts["nodes_per_level"].get(lvl, 0) for lvl in levels]
+            _write_sheet(writer, 'Generation', _comparison_columns(labels, golden_vals, test_vals))
+
+            # Nodes (general metrics first, then gender distribution)
+            gg = golden_ext["gender_and_naming"]["gender_distribution"]
+            tg = test_ext["gender_and_naming"]["gender_distribution"]
+            sexes = sorted(set(gg.keys()) | set(tg.keys()))
+            labels = [key.replace('_', ' ').title() for key in golden_metrics] + sexes
+            golden_vals = list(golden_metrics.values()) + [gg.get(sex, 0) for sex in sexes]
+            test_vals = [test_metrics[key] for key in golden_metrics] + [tg.get(sex, 0) for sex in sexes]
+            _write_sheet(writer, 'Nodes', _comparison_columns(labels, golden_vals, test_vals))
+
+            # Diseases (show all possible disease patterns from model)
+            gd = golden_ext["shading"]["disease_counts"]
+            td = test_ext["shading"]["disease_counts"]
+            _write_sheet(writer, 'Diseases', _comparison_columns(
+                list(_DISEASE_PATTERNS), [gd.get(p, 0) for p in _DISEASE_PATTERNS], [td.get(p, 0) for p in _DISEASE_PATTERNS]))
 
             # Symbols (show all possible symbols)
-            rows = []
-            gs = golden_ext["symbols"]
-            ts = test_ext["symbols"]
-            # All possible symbol types
-            all_symbol_types = ['Adopted_in', 'Adopted_out', 'Carrier', 'Deceased', 'Divorce', 'Patient']
-            for symbol in sorted(all_symbol_types):
-                add_row(f"{symbol}", gs["symbol_counts"].get(symbol, 0), ts["symbol_counts"].get(symbol, 0))
-            pd.DataFrame(rows).to_excel(writer, sheet_name='Symbols', index=False)
+            gsym = golden_ext["symbols"]["symbol_counts"]
+            tsym = test_ext["symbols"]["symbol_counts"]
+            _write_sheet(writer, 'Symbols', _comparison_columns(
+                list(_SYMBOL_TYPES), [gsym.get(s, 0) for s in _SYMBOL_TYPES], [tsym.get(s, 0) for s in _SYMBOL_TYPES]))
 
             # Edges (twin relationships)
-            rows = []
             ge = golden_ext["edges"]
             te = test_ext["edges"]
-            add_row("DZ Twin (Dizygotic) Count", ge["dztwin_count"], te["dztwin_count"])
-            add_row("MZ Twin (Monozygotic) Count", ge["mztwin_count"], te["mztwin_count"])
-            pd.DataFrame(rows).to_excel(writer, sheet_name='Edges', index=False)
-
-            # Adjust widths
-            for sheet_name in writer.sheets:
-                worksheet = writer.sheets[sheet_name]
-                for column in worksheet.columns:
-                    max_length = 0
-                    column = [cell for cell in column]
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except Exception:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
+            _write_sheet(writer, 'Edges', _comparison_columns(
+                ["DZ Twin (Dizygotic) Count", "MZ Twin (Monozygotic) Count"],
+                [ge["dztwin_count"], ge["mztwin_count"]],
+                [te["dztwin_count"], te["mztwin_count"]]))
         print(f"Excel extended sheets appended to: {excel_file}")
     except Exception as e:
         print(f"Error exporting extended Excel: {e}")
@@ -12,25 +12,76 @@ This script orchestrates the entire comparison process:
 
 Usage:
     python pedigree_main.py
+    python pedigree_main.py golden1.json test1.json [golden2.json test2.json ...]
+
+With no arguments golden.json is compared against test.json and the full
+report (console + comparison_results.xlsx) is produced. With file pairs the
+pairs are scored in parallel and only the final scores are printed.
 """
 
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 
 # Import our modules
 from pedigree_core import (
     load_json_file, 
     extract_nodes, 
-    compute_metrics, 
-    print_metrics, 
-    compute_extended_metrics
+    analyze, 
+    print_metrics
 )
-from pedigree_scoring import calculate_comprehensive_score, print_score_breakdown
+from pedigree_scoring import ScoreBreakdown, calculate_comprehensive_score, print_score_breakdown
 from pedigree_export import export_extended_to_excel  # Handles all Excel exports
 
 
+def score_pair(pair: Tuple[str, str]) -> ScoreBreakdown:
+    """Load a (golden, test) pair of JSON files and return its score breakdown"""
+    golden_file, test_file = pair
+    golden_metrics, golden_ext = analyze(extract_nodes(load_json_file(golden_file)))
+    test_metrics, test_ext = analyze(extract_nodes(load_json_file(test_file)))
+    return calculate_comprehensive_score(golden_metrics, test_metrics, golden_ext, test_ext)
+
+
+def _score_pair_line(pair: Tuple[str, str]) -> Tuple[bool, str]:
+    """Score one pair for main_pairs: (succeeded, line to print), so one bad pair doesn't stop the rest"""
+    golden_file, test_file = pair
+    try:
+        score_data = score_pair(pair)
+    except (FileNotFoundError, ValueError) as e:
+        return False, f"{golden_file} vs {test_file}: Error: {e}"
+    except Exception as e:
+        return False, f"{golden_file} vs {test_file}: Unexpected error: {e}"
+    return True, f"{golden_file} vs {test_file}: Score = {score_data.final_score:.1f}/100"
+
+
+def main_pairs(paths: List[str]) -> None:
+    """Score golden/test file pairs given on the command line"""
+    if len(paths) % 2:
+        print("Error: expected golden/test file pairs")
+        sys.exit(1)
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Error: {path} not found")
+            sys.exit(1)
+
+    pairs = list(zip(paths[::2], paths[1::2]))
+    # Pairs are independent: score them across all cores, printing in input order
+    failed = False
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for ok, line in executor.map(_score_pair_line, pairs, chunksize=8):
+            print(line)
+            failed = failed or not ok
+    if failed:
+        sys.exit(1)
+
+
 def main() -> None:
     """Main execution function"""
+    if len(sys.argv) > 1:
+        main_pairs(sys.argv[1:])
+        return
+
     golden_file = "golden.json"
     test_file = "test.json"
     
@@ -50,20 +101,15 @@ def main() -> None:
         golden_nodes = extract_nodes(golden_data)
         test_nodes = extract_nodes(test_data)
 
-        # Compute basic metrics
-        print("Computing basic metrics...")
-        golden_metrics = compute_metrics(golden_nodes)
-        test_metrics = compute_metrics(test_nodes)
+        # Compute basic and extended metrics in one pass over each node list
+        print("Computing metrics...")
+        golden_metrics, golden_ext = analyze(golden_nodes)
+        test_metrics, test_ext = analyze(test_nodes)
 
         # Print basic metrics
         print_metrics("Golden JSON Metrics", golden_metrics)
         print_metrics("Test JSON Metrics", test_metrics)
         
-        # Compute extended analytics
-        print("Computing extended analytics...")
-        golden_ext = compute_extended_metrics(golden_nodes)
-        test_ext = compute_extended_metrics(test_nodes)
-        
         # Calculate comprehensive score
         print("Calculating comprehensive score...")
         score_data = calculate_comprehensive_score(golden_metrics, test_metrics, golden_ext, test_ext)
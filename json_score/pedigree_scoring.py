@@ -9,16 +9,56 @@ Scoring system for pedigree JSON comparison:
 - Score interpretation and breakdown
 """
 
-from typing import Dict, Any
-from pedigree_core import calculate_generation_weight
+from typing import Dict, Any, NamedTuple
+from pedigree_core import generation_weights
+
+class ScoreBreakdown(NamedTuple):
+    """Final score with its raw and weighted tier deductions"""
+    final_score: float
+    tier1_deductions: float
+    tier2_deductions: float
+    tier3_deductions: float
+    total_deductions: float
+    tier1_weighted: float
+    tier2_weighted: float
+    tier3_weighted: float
+
+
+# Perfect score with no deductions, shared by every identical pair
+_PERFECT_SCORE = ScoreBreakdown(100.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+# Extended-metric sections read by calculate_comprehensive_score
+_SCORED_SECTIONS = ("structural", "gender_and_naming", "shading", "symbols", "edges")
+
+# Basic metrics that carry a tier-2 penalty, with their points per unit of difference:
+# parent (13% of total), partner (13%) and sibling count/distribution (14%) relationships
+_TIER2_WEIGHTS = (
+    ("nodes_with_no_parents_true", 4),
+    ("nodes_with_one_partner", 4),
+    ("nodes_with_multiple_partners", 4),
+    ("nodes_with_siblings", 4),
+    ("nodes_with_1_sibling", 4),
+    ("nodes_with_2_siblings", 4),
+    ("nodes_with_3_siblings", 4),
+    ("nodes_with_4_siblings", 4),
+    ("nodes_with_5_or_more_siblings", 4),
+)
+
+# Status symbols that carry a tier-3 penalty
+_IMPORTANT_SYMBOLS = ("Deceased", "Adopted_in", "Adopted_out")
 
 
 def calculate_comprehensive_score(golden_metrics: Dict[str, int], test_metrics: Dict[str, int], 
-                                golden_ext: Dict[str, Any], test_ext: Dict[str, Any]) -> Dict[str, float]:
+                                golden_ext: Dict[str, Any], test_ext: Dict[str, Any]) -> ScoreBreakdown:
     """Calculate comprehensive score based on tiered penalty system"""
     
     # Base score
     base_score = 100.0
+
+    # Identical inputs: every diff below is zero, so skip straight to the perfect score
+    if golden_metrics == test_metrics and all(golden_ext[s] == test_ext[s] for s in _SCORED_SECTIONS):
+        return _PERFECT_SCORE
     
     # TIER 1: Foundation Metrics (50% weight)
     tier1_deductions = 0.0
@@ -40,15 +80,14 @@ def calculate_comprehensive_score(golden_metrics: Dict[str, int], test_metrics:
     max_level = max(numeric_levels) if numeric_levels else 0
     total_levels = max_level + 1
 
+    # Weights for 0..total_levels-1, memoized per total_levels across comparisons
+    weights = generation_weights(total_levels)
     weighted_level_error = 0.0
-    for level in all_levels:
-        if not isinstance(level, int) or level < 0:
-            continue
-        golden_count = golden_levels.get(level, 0)
-        test_count = test_levels.get(level, 0)
-        diff = abs(golden_count - test_count)
-        weight = calculate_generation_weight(level, total_levels)
-        weighted_level_error += diff * weight
+    if golden_levels != test_levels:
+        weighted_level_error = sum(
+            abs(golden_levels.get(level, 0) - test_levels.get(level, 0)) * weights[level]
+            for level in numeric_levels
+        )
 
     # Scale by the same per-node penalty (2 pts) as before
     tier1_deductions += weighted_level_error * 2
@@ -71,29 +110,9 @@ def calculate_comprehensive_score(golden_metrics: Dict[str, int], test_metrics:
     # TIER 2: Relationship Metrics (40% weight)
     tier2_deductions = 0.0
     
-    # Parent Relationships (13% of total)
-    noparents_diff = abs(golden_metrics["nodes_with_no_parents_true"] - test_metrics["nodes_with_no_parents_true"])
-    tier2_deductions += noparents_diff * 4
-    
-    # Partner Relationships (13% of total)
-    partner_diff = (abs(golden_metrics["nodes_with_one_partner"] - test_metrics["nodes_with_one_partner"]) +
-                   abs(golden_metrics["nodes_with_multiple_partners"] - test_metrics["nodes_with_multiple_partners"]))
-    tier2_deductions += partner_diff * 4
-    
-    # Sibling Relationships (14% of total)
-    # Overall sibling count
-    siblings_total_diff = abs(golden_metrics["nodes_with_siblings"] - test_metrics["nodes_with_siblings"])
-    tier2_deductions += siblings_total_diff * 4
-    
-    # Detailed sibling distribution
-    sibling_dist_diff = (
-        abs(golden_metrics["nodes_with_1_sibling"] - test_metrics["nodes_with_1_sibling"]) +
-        abs(golden_metrics["nodes_with_2_siblings"] - test_metrics["nodes_with_2_siblings"]) +
-        abs(golden_metrics["nodes_with_3_siblings"] - test_metrics["nodes_with_3_siblings"]) +
-        abs(golden_metrics["nodes_with_4_siblings"] - test_metrics["nodes_with_4_siblings"]) +
-        abs(golden_metrics["nodes_with_5_or_more_siblings"] - test_metrics["nodes_with_5_or_more_siblings"])
-    )
-    tier2_deductions += sibling_dist_diff * 4
+    # Parent (13%), partner (13%) and sibling (14%) relationships, one pass over _TIER2_WEIGHTS
+    tier2_deductions += sum(abs(golden_metrics[key] - test_metrics[key]) * weight
+                            for key, weight in _TIER2_WEIGHTS)
     
     # TIER 3: Special Attributes (11% weight)
     tier3_deductions = 0.0
@@ -102,18 +121,20 @@ def calculate_comprehensive_score(golden_metrics: Dict[str, int], test_metrics:
     # Disease patterns
     golden_diseases = golden_ext["shading"]["disease_counts"]
     test_diseases = test_ext["shading"]["disease_counts"]
-    all_diseases = set(golden_diseases.keys()) | set(test_diseases.keys())
-    
-    for disease in all_diseases:
-        disease_diff = abs(golden_diseases.get(disease, 0) - test_diseases.get(disease, 0))
+    if golden_diseases != test_diseases:
+        # Only differing entries contribute: shared keys with unequal counts, plus
+        # keys present on one side only (their full count is the diff)
+        common = golden_diseases.keys() & test_diseases.keys()
+        disease_diff = sum(abs(golden_diseases[d] - test_diseases[d]) for d in common
+                           if golden_diseases[d] != test_diseases[d])
+        disease_diff += sum(golden_diseases[d] for d in golden_diseases.keys() - common)
+        disease_diff += sum(test_diseases[d] for d in test_diseases.keys() - common)
         tier3_deductions += disease_diff * 1
     
     # Status symbols
     golden_symbols = golden_ext["symbols"]["symbol_counts"]
     test_symbols = test_ext["symbols"]["symbol_counts"]
-    important_symbols = ["Deceased", "Adopted_in", "Adopted_out"]
-    
-    for symbol in important_symbols:
+    for symbol in _IMPORTANT_SYMBOLS:
         symbol_diff = abs(golden_symbols.get(symbol, 0) - test_symbols.get(symbol, 0))
         tier3_deductions += symbol_diff * 2
     
@@ -129,27 +150,27 @@ def calculate_comprehensive_score(golden_metrics: Dict[str, int], test_metrics:
     
     final_score = max(0.0, base_score - total_deductions)
     
-    return {
-        "final_score": final_score,
-        "tier1_deductions": tier1_deductions,
-        "tier2_deductions": tier2_deductions,
-        "tier3_deductions": tier3_deductions,
-        "total_deductions": total_deductions,
-        "tier1_weighted": tier1_deductions * 0.63,
-        "tier2_weighted": tier2_deductions * 0.26,
-        "tier3_weighted": tier3_deductions * 0.11
-    }
+    return ScoreBreakdown(
+        final_score=final_score,
+        tier1_deductions=tier1_deductions,
+        tier2_deductions=tier2_deductions,
+        tier3_deductions=tier3_deductions,
+        total_deductions=total_deductions,
+        tier1_weighted=tier1_deductions * 0.63,
+        tier2_weighted=tier2_deductions * 0.26,
+        tier3_weighted=tier3_deductions * 0.11
+    )
 
 
-def print_score_breakdown(score_data: Dict[str, float]) -> None:
+def print_score_breakdown(score_data: ScoreBreakdown) -> None:
     """Print detailed score breakdown"""
     print("COMPREHENSIVE SCORE BREAKDOWN")
     print("=" * 50)
-    print(f"FINAL SCORE: {score_data['final_score']:.1f}/100")
+    print(f"FINAL SCORE: {score_data.final_score:.1f}/100")
     print("")
     
     # Score interpretation
-    score = score_data['final_score']
+    score = score_data.final_score
     if score >= 90:
         interpretation = "🟢 EXCELLENT - Minor issues only"
     elif score >= 80:
@@ -165,8 +186,8 @@ def print_score_breakdown(score_data: Dict[str, float]) -> None:
     print("")
     
     print("📋 TIER BREAKDOWN:")
-    print(f"   Tier 1 (Foundation 63%):     -{score_data['tier1_weighted']:.1f} pts")
-    print(f"   Tier 2 (Relationships 26%):  -{score_data['tier2_weighted']:.1f} pts")
-    print(f"   Tier 3 (Attributes 11%):     -{score_data['tier3_weighted']:.1f} pts")
-    print(f"   Total Deductions:             -{score_data['total_deductions']:.1f} pts")
+    print(f"   Tier 1 (Foundation 63%):     -{score_data.tier1_weighted:.1f} pts")
+    print(f"   Tier 2 (Relationships 26%):  -{score_data.tier2_weighted:.1f} pts")
+    print(f"   Tier 3 (Attributes 11%):     -{score_data.tier3_weighted:.1f} pts")
+    print(f"   Total Deductions:             -{score_data.total_deductions:.1f} pts")
     print("") 
\ No newline at end of file
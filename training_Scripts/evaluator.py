@@ -1,11 +1,54 @@
-import pandas as pd
+from functools import lru_cache
 import numpy as np
 import supervision as sv
+import xlsxwriter
 from ultralytics import YOLO
 from tqdm import tqdm
 import os
 
-def evaluate_model(model_path, dataset_path, class_names, conf_threshold=0.3, iou_threshold=0.5):
+
+# Square input size used for the warmup prediction
+WARMUP_IMGSZ = 928
+
+
+@lru_cache(maxsize=4)
+def _load_model(model_path, half=False):
+    """Load a YOLO model once per (path, precision) and warm it up on a blank image"""
+    model = YOLO(model_path)
+    # The first predict pays CUDA/cuDNN setup; take that hit here rather than on a real image
+    model.predict(np.zeros((WARMUP_IMGSZ, WARMUP_IMGSZ, 3), dtype=np.uint8), half=half, verbose=False)
+    return model
+
+
+@lru_cache(maxsize=4)
+def _export_int8(model_path, data_yaml_path, batch_size):
+    """Export a TensorRT INT8 engine (calibrated on data_yaml_path) once per model and batch size; returns its path"""
+    # A static engine only accepts its export batch shape; dynamic=True with batch=batch_size
+    # accepts any batch up to batch_size, covering the full batches, the last partial one and warmup
+    return YOLO(model_path).export(format='engine', int8=True, data=data_yaml_path,
+                                   batch=batch_size, dynamic=True)
+
+
+def _confusion_metrics(matrix):
+    """Per-class TP, FP, FN, precision and recall vectors from a (C+1, C+1) confusion matrix"""
+    tp, fp, fn = matrix.diagonal(), matrix[-1, :], matrix[:, -1]
+    precision = np.divide(tp, tp + fp, out=np.zeros_like(tp, dtype=float), where=(tp + fp) > 0)
+    recall = np.divide(tp, tp + fn, out=np.zeros_like(tp, dtype=float), where=(tp + fn) > 0)
+    return tp, fp, fn, precision, recall
+
+
+def _write_rows(worksheet, rows, header_format):
+    """Write a header (keys of the first row) and then one row per dict"""
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    worksheet.write_row(0, 0, columns, header_format)
+    for row_idx, row in enumerate(rows, start=1):
+        worksheet.write_row(row_idx, 0, [row.get(col) for col in columns])
+
+
+def evaluate_model(model_path, dataset_path, class_names, conf_threshold=0.3, iou_threshold=0.5, batch_size=16,
+                   half=False, int8=False):
     """
     Evaluate a YOLO model using Supervision library
     Args:
@@ -14,6 +57,9 @@ def evaluate_model(model_path, dataset_path, class_names, conf_threshold=0.3, io
         class_names: List of class names
         conf_threshold: Confidence threshold for predictions
         iou_threshold: IoU threshold for mAP calculation
+        batch_size: Number of images passed to each model.predict call
+        half: Run FP16 inference (on supported GPUs)
+        int8: Run inference on a TensorRT INT8 export of the model (float weights are the default)
     """
     try:
         evaluation_results = {}
@@ -25,157 +71,185 @@ def evaluate_model(model_path, dataset_path, class_names, conf_threshold=0.3, io
             data_yaml_path=os.path.join(dataset_path, "data.yaml"),
         )
 
-        # Load model
-        model = YOLO(model_path)
+        # Load model (cached and warmed up across evaluate_model calls)
+        if int8:
+            model = _load_model(_export_int8(model_path, os.path.join(dataset_path, "data.yaml"), batch_size), half)
+        else:
+            model = _load_model(model_path, half)
 
-        def callback(image: np.ndarray) -> sv.Detections:
-            result = model.predict(image, conf=conf_threshold, verbose=False)[0]
-            return sv.Detections.from_ultralytics(result)
+        def predict_batch(batch):
+            """Run one model.predict over a batch and yield (image_path, labels, result)"""
+            try:
+                results = model.predict([image for _, image, _ in batch], conf=conf_threshold,
+                                        half=half, verbose=False)
+            except Exception as e:
+                for image_path, _, _ in batch:
+                    print(f"Error processing image {image_path}: {str(e)}")
+                return
+            for (image_path, _, labels), result in zip(batch, results):
+                yield image_path, labels, result
+
+        def batched_results():
+            """Predict batch_size images per model call, yielding per-image results in dataset order"""
+            batch = []
+            for item in tqdm(ds):
+                batch.append(item)
+                if len(batch) == batch_size:
+                    yield from predict_batch(batch)
+                    batch = []
+            if batch:
+                yield from predict_batch(batch)
 
         # Run predictions
         predictions, targets = [], []
         image_names = []
         per_image_results = []
+        # Global confusion matrix, accumulated from the per-image matrices
+        # (from_detections over all images is exactly their sum)
+        num_classes = len(ds.classes)
+        global_matrix = np.zeros((num_classes + 1, num_classes + 1))
         
-        print(f"\nEvaluating model: {os.path.basename(model_path)}")
-        for image_path, image, labels in tqdm(ds):
-            try:
-                detections = callback(image)
-                predictions.append(detections)
-                targets.append(labels)
-                
-                # Store image name for per-image results
-                image_name = os.path.basename(image_path)
-                image_names.append(image_name)
-                
-                # Calculate per-image confusion matrix
-                img_confusion_matrix = sv.ConfusionMatrix.from_detections(
-                    predictions=[detections],
-                    targets=[labels],
-                    classes=ds.classes,
-                    conf_threshold=conf_threshold,
-                    iou_threshold=iou_threshold
-                )
+        # Per-image column names, built once rather than formatted per image
+        class_keys = [
+            (f'{c}_TP', f'{c}_FP', f'{c}_FN', f'{c}_Precision', f'{c}_Recall')
+            for c in class_names
+        ]
+
+        # Per-image rows are streamed to the workbook as they are computed. Constant-memory
+        # mode flushes each row once the next one starts; sheets are added in final order.
+        output_path = f"evaluation_results_{os.path.basename(model_path).split('.')[0]}.xlsx"
+        # The with block closes the workbook even if evaluation fails part-way
+        with xlsxwriter.Workbook(output_path, {'constant_memory': True}) as wb:
+            header_format = wb.add_format({'bold': True})
+            class_ws = wb.add_worksheet('Class_Results')
+            map_ws = wb.add_worksheet('mAP_Results')
+            per_image_ws = wb.add_worksheet('Per_Image_Results')
+
+            # Fixed per-image schema: the confusion matrix has num_classes + 1 rows, so only
+            # that many classes get columns. The header is written once, up front.
+            per_image_columns = ['Image'] + [key for keys in class_keys[:num_classes + 1] for key in keys]
+            per_image_ws.write_row(0, 0, per_image_columns, header_format)
+            # Row values for an image with no predictions and no ground truth (all-zero matrix)
+            empty_image_metrics = {
+                key: (0 if idx < 3 else 0.0)
+                for keys in class_keys[:num_classes + 1] for idx, key in enumerate(keys)
+            }
+            per_image_row = 1
+
+            print(f"\nEvaluating model: {os.path.basename(model_path)}")
+            for image_path, labels, result in batched_results():
+                try:
+                    detections = sv.Detections.from_ultralytics(result)
+                    predictions.append(detections)
+                    targets.append(labels)
                 
-                # Per-image metrics for each class
-                img_results = {'Image': image_name}
+                    # Store image name for per-image results
+                    image_name = os.path.basename(image_path)
+                    image_names.append(image_name)
                 
-                # Calculate metrics for each class
-                for i, class_name in enumerate(class_names):
-                    if i < len(img_confusion_matrix.matrix):
-                        tp = int(img_confusion_matrix.matrix[i, i])
-                        fp = int(img_confusion_matrix.matrix[-1, i])
-                        fn = int(img_confusion_matrix.matrix[i, -1])
-                        
-                        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
-                        recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
-                        
-                        img_results.update({
-                            f'{class_name}_TP': tp,
-                            f'{class_name}_FP': fp,
-                            f'{class_name}_FN': fn,
-                            f'{class_name}_Precision': round(precision, 4),
-                            f'{class_name}_Recall': round(recall, 4)
-                        })
+                    if len(detections) == 0 and len(labels) == 0:
+                        # Negative sample: the matrix would be all zeros, so skip the matching
+                        img_results = {'Image': image_name, **empty_image_metrics}
+                        per_image_results.append(img_results)
+                        per_image_ws.write_row(per_image_row, 0, [img_results.get(col) for col in per_image_columns])
+                        per_image_row += 1
+                        continue
                 
-                per_image_results.append(img_results)
+                    # Calculate per-image confusion matrix
+                    img_confusion_matrix = sv.ConfusionMatrix.from_detections(
+                        predictions=[detections],
+                        targets=[labels],
+                        classes=ds.classes,
+                        conf_threshold=conf_threshold,
+                        iou_threshold=iou_threshold
+                    )
+                    global_matrix += img_confusion_matrix.matrix
                 
-            except Exception as e:
-                print(f"Error processing image {image_path}: {str(e)}")
-                continue
-
-        # Calculate overall Confusion Matrix
-        confusion_matrix = sv.ConfusionMatrix.from_detections(
-            predictions=predictions,
-            targets=targets,
-            classes=ds.classes,
-            conf_threshold=conf_threshold,
-            iou_threshold=iou_threshold
-        )
+                    # Per-image metrics for each class, extracted from the matrix in one go
+                    tp, fp, fn, precision, recall = _confusion_metrics(img_confusion_matrix.matrix)
 
-        # Calculate overall metrics for each class
-        class_results = {}
-        for i, class_name in enumerate(class_names):
-            if i < len(confusion_matrix.matrix):
-                tp = int(confusion_matrix.matrix[i, i])
-                fp = int(confusion_matrix.matrix[-1, i])
-                fn = int(confusion_matrix.matrix[i, -1])
+                    img_results = {'Image': image_name}
+                    # zip stops at the shorter of class_names and the matrix rows
+                    for keys, t, f, n, p, r in zip(class_keys, tp.tolist(), fp.tolist(), fn.tolist(),
+                                                   precision.tolist(), recall.tolist()):
+                        img_results.update(zip(keys, (int(t), int(f), int(n), round(p, 4), round(r, 4))))
                 
-                precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
-                recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+                    per_image_results.append(img_results)
+                    per_image_ws.write_row(per_image_row, 0, [img_results.get(col) for col in per_image_columns])
+                    per_image_row += 1
                 
-                class_results[class_name] = {
-                    'TP': tp,
-                    'FP': fp,
-                    'FN': fn,
-                    'Precision': round(precision, 4),
-                    'Recall': round(recall, 4)
-                }
+                except Exception as e:
+                    print(f"Error processing image {image_path}: {str(e)}")
+                    continue
 
-        # Calculate mAP
-        try:
-            mean_average_precision = sv.MeanAveragePrecision.from_detections(
-                predictions=predictions,
-                targets=targets
-            )
-            
-            # Add mAP results to class_results
-            class_results['mAP'] = {
-                'TP': 0,  # Placeholder values for consistency
-                'FP': 0,
-                'FN': 0,
-                'Precision': round(mean_average_precision.map50, 4),
-                'Recall': round(mean_average_precision.map50_95, 4)
-            }
-        except Exception as e:
-            print(f"Warning: Could not calculate mAP: {str(e)}")
+            # Calculate overall metrics for each class, vectorized over the global matrix
+            tp_all, fp_all, fn_all, precision_all, recall_all = _confusion_metrics(global_matrix)
 
-        evaluation_results[os.path.basename(model_path)] = class_results
+            class_results = {}
+            for i, class_name in enumerate(class_names):
+                if i < len(global_matrix):
+                    class_results[class_name] = {
+                        'TP': int(tp_all[i]),
+                        'FP': int(fp_all[i]),
+                        'FN': int(fn_all[i]),
+                        'Precision': round(float(precision_all[i]), 4),
+                        'Recall': round(float(recall_all[i]), 4)
+                    }
 
-        # Format results for Excel
-            # Modified part of the code where we create Excel data:
-        # Format results for Excel
-        modified_data = []
-        map_data = []
-        
-        for model_name, results in evaluation_results.items():
-            # Separate mAP metrics
-            if 'mAP' in results:
-                map_metrics = results.pop('mAP')  # Remove mAP from class results
-                map_data.append({
-                    'Model': model_name,
-                    'mAP50': map_metrics['Precision'],  # Using Precision field for mAP50
-                    'mAP50-95': map_metrics['Recall']   # Using Recall field for mAP50-95
-                })
+            # Calculate mAP
+            try:
+                mean_average_precision = sv.MeanAveragePrecision.from_detections(
+                    predictions=predictions,
+                    targets=targets
+                )
             
-            # Process class metrics
-            for class_name, metrics in results.items():
-                row = {
-                    'Model': model_name,
-                    'Class': class_name,
-                    'TP': metrics['TP'],
-                    'FP': metrics['FP'],
-                    'FN': metrics['FN'],
-                    'Precision': metrics['Precision'],
-                    'Recall': metrics['Recall']
+                # Add mAP results to class_results
+                class_results['mAP'] = {
+                    'TP': 0,  # Placeholder values for consistency
+                    'FP': 0,
+                    'FN': 0,
+                    'Precision': round(mean_average_precision.map50, 4),
+                    'Recall': round(mean_average_precision.map50_95, 4)
                 }
-                modified_data.append(row)
+            except Exception as e:
+                print(f"Warning: Could not calculate mAP: {str(e)}")
 
-        # Save results to Excel with multiple sheets
-        output_path = f"evaluation_results_{os.path.basename(model_path).split('.')[0]}.xlsx"
+            evaluation_results[os.path.basename(model_path)] = class_results
+
+            # Format results for Excel
+                # Modified part of the code where we create Excel data:
+            # Format results for Excel
+            modified_data = []
+            map_data = []
         
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Sheet 1: Class-wise results
-            aggregated_df = pd.DataFrame(modified_data)
-            aggregated_df.to_excel(writer, sheet_name='Class_Results', index=False)
+            for model_name, results in evaluation_results.items():
+                # Separate mAP metrics
+                if 'mAP' in results:
+                    map_metrics = results.pop('mAP')  # Remove mAP from class results
+                    map_data.append({
+                        'Model': model_name,
+                        'mAP50': map_metrics['Precision'],  # Using Precision field for mAP50
+                        'mAP50-95': map_metrics['Recall']   # Using Recall field for mAP50-95
+                    })
             
+                # Process class metrics
+                for class_name, metrics in results.items():
+                    row = {
+                        'Model': model_name,
+                        'Class': class_name,
+                        'TP': metrics['TP'],
+                        'FP': metrics['FP'],
+                        'FN': metrics['FN'],
+                        'Precision': metrics['Precision'],
+                        'Recall': metrics['Recall']
+                    }
+                    modified_data.append(row)
+
+            # Save the remaining sheets (per-image rows were written during the loop)
+            # Sheet 1: Class-wise results
+            _write_rows(class_ws, modified_data, header_format)
             # Sheet 2: mAP metrics
-            map_df = pd.DataFrame(map_data)
-            map_df.to_excel(writer, sheet_name='mAP_Results', index=False)
-            
-            # Sheet 3: Per-image results
-            per_image_df = pd.DataFrame(per_image_results)
-            per_image_df.to_excel(writer, sheet_name='Per_Image_Results', index=False)
+            _write_rows(map_ws, map_data, header_format)
         
         print(f"\nResults saved to: {output_path}")
         print(f" Aggregated Results: {len(modified_data)} rows")